@@ -4,7 +4,7 @@
 import json
 import logging
 import time
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
@@ -129,12 +129,12 @@ class AIPresets:
 
 # ---------- Пагинация и поиск ----------
 class Paginator:
-    def __init__(self, items: List, page_size: int = 10):
+    def __init__(self, items: Sequence, page_size: int = 10):
         self.items = items
         self.page_size = page_size
         self.current_page = 0
         
-    def get_page(self, page: int) -> Tuple[List, int, int, int]:
+    def get_page(self, page: int) -> Tuple[Sequence, int, int, int]:
         """Возвращает страницу, текущую страницу, общее количество страниц"""
         if page < 0:
             page = 0
@@ -163,7 +163,7 @@ class Paginator:
 
 class ModelSearch:
     def __init__(self):
-        self.models = [
+        self.models = (
             "deepseek/deepseek-chat-v3-0324:free",
             "deepseek/deepseek-r1-distill-llama-70b:free",
             "deepseek/deepseek-r1-0528:free",
@@ -173,21 +173,29 @@ class ModelSearch:
             "gpt-3.5-turbo",
             "deepseek-chat",
             "gemini-flash-1.5-8b"
-        ]
+        )
+    
+    @property
+    def models(self) -> Tuple[str, ...]:
+        """Список моделей; неизменяемый, чтобы индекс для поиска не устарел"""
+        return self._models
+    
+    @models.setter
+    def models(self, models: Sequence[str]) -> None:
+        self._models = tuple(models)
+        # Названия в нижнем регистре считаются при каждой замене списка, а не при каждом поиске
+        self._models_lower = tuple(model.lower() for model in self._models)
     
     def search(self, query: str) -> List[str]:
         """Поиск моделей по запросу"""
         query = query.lower()
-        results = []
-        
-        for model in self.models:
-            if query in model.lower():
-                results.append(model)
-        
-        return results
+        return [
+            model for model, model_lower in zip(self._models, self._models_lower)
+            if query in model_lower
+        ]
     
     def get_all(self) -> List[str]:
-        return self.models.copy()
+        return list(self._models)
 
 # ---------- Клавиатуры админки ----------
 def build_admin_keyboard() -> Dict:
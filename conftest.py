@@ -0,0 +1,26 @@
+"""
+Общие настройки pytest: тесты никогда не пишут в рабочую базу crycat.db
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+
+def pytest_configure(config):
+    """Направляет хранилище во временную базу до сбора тестов.
+
+    Часть модулей (например, economy_social) открывает хранилище уже при импорте,
+    поэтому DB_PATH подменяется раньше, чем тестовые файлы будут импортированы.
+    Под xdist хук выполняется в каждом воркере, и у каждого своя база.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="crybot-tests-")
+    os.environ["DB_PATH"] = os.path.join(tmp_dir, "test.db")
+    config.add_cleanup(lambda: shutil.rmtree(tmp_dir, ignore_errors=True))
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch):
+    """Отдельная база для каждого теста, который открывает хранилище сам"""
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "test.db"))
@@ -4,7 +4,7 @@
 import json
 import time
 import random
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
@@ -134,6 +134,8 @@ class BoosterShop:
             effects={"quality_boost": 25.0}
         )
     }
+    # Список бустеров строится один раз при загрузке модуля
+    BOOSTER_LIST: Tuple[AIBooster, ...] = tuple(BOOSTERS.values())
     
     @classmethod
     def get_booster(cls, booster_id: str) -> Optional[AIBooster]:
@@ -141,9 +143,9 @@ class BoosterShop:
         return cls.BOOSTERS.get(booster_id)
     
     @classmethod
-    def list_boosters(cls) -> List[AIBooster]:
+    def list_boosters(cls) -> Tuple[AIBooster, ...]:
         """Возвращает список всех бустеров"""
-        return list(cls.BOOSTERS.values())
+        return cls.BOOSTER_LIST
 
 # ---------- Ежедневные задания ----------
 class DailyTasks:
@@ -176,6 +178,8 @@ class DailyTasks:
             category="social"
         )
     }
+    # Список заданий строится один раз при загрузке модуля
+    TASK_LIST: Tuple[DailyTask, ...] = tuple(TASKS.values())
     
     @classmethod
     def get_task(cls, task_id: str) -> Optional[DailyTask]:
@@ -183,11 +187,11 @@ class DailyTasks:
         return cls.TASKS.get(task_id)
     
     @classmethod
-    def list_tasks(cls, category: Optional[str] = None) -> List[DailyTask]:
+    def list_tasks(cls, category: Optional[str] = None) -> Tuple[DailyTask, ...]:
         """Возвращает список заданий"""
         if category:
-            return [task for task in cls.TASKS.values() if task.category == category]
-        return list(cls.TASKS.values())
+            return tuple(task for task in cls.TASK_LIST if task.category == category)
+        return cls.TASK_LIST
 
 # ---------- Глобальные переменные ----------
 USER_WALLETS: Dict[int, UserWallet] = {}
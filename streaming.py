@@ -2,19 +2,37 @@
 Модуль стриминга и индикаторов для AI ответов
 """
 import time
-import threading
 from typing import Optional, Callable, Dict, List
 from dataclasses import dataclass
 from enum import Enum
 
+# Монотонные часы высокого разрешения: длительность не ломается при переводе
+# системного времени, а на Windows time.monotonic тикает шагами ~15.6 мс
+_now = time.perf_counter
+
 # ---------- Типы индикаторов ----------
 class IndicatorType(Enum):
-    TYPING = "typing"
-    THINKING = "thinking"
-    PROCESSING = "processing"
-    GENERATING = "generating"
-    COMPLETED = "completed"
-    ERROR = "error"
+    """Тип индикатора; каждый член несет свои эмодзи и сообщение по умолчанию"""
+    # Атрибуты членов задаются в __new__; аннотации без значения членами не становятся
+    emoji: str
+    message: str
+    text: str
+    
+    TYPING = ("typing", "⌨️", "набирает текст...")
+    THINKING = ("thinking", "🤔", "думает...")
+    PROCESSING = ("processing", "⚙️", "обрабатывает запрос...")
+    GENERATING = ("generating", "🧠", "генерирует ответ...")
+    COMPLETED = ("completed", "✅", "готово!")
+    ERROR = ("error", "❌", "ошибка!")
+    
+    def __new__(cls, value: str, emoji: str, message: str) -> "IndicatorType":
+        member = object.__new__(cls)
+        member._value_ = value
+        member.emoji = emoji
+        member.message = message
+        # Готовый текст индикатора без пользовательского сообщения
+        member.text = f"{emoji} {message}"
+        return member
 
 @dataclass
 class StreamingIndicator:
@@ -28,128 +46,93 @@ class StreamingIndicator:
     def start(self):
         """Запускает индикатор"""
         self.is_active = True
-        self.start_time = time.time()
+        self.start_time = _now()
     
     def stop(self):
         """Останавливает индикатор"""
         self.is_active = False
-        self.duration = time.time() - self.start_time
+        self.duration = _now() - self.start_time
     
     def get_elapsed_time(self) -> float:
         """Возвращает прошедшее время"""
         if not self.is_active:
             return self.duration
-        return time.time() - self.start_time
+        return _now() - self.start_time
 
-# ---------- Индикаторы по умолчанию ----------
-DEFAULT_INDICATORS = {
-    IndicatorType.TYPING: StreamingIndicator(
-        type=IndicatorType.TYPING,
-        message="набирает текст...",
-        emoji="⌨️"
-    ),
-    IndicatorType.THINKING: StreamingIndicator(
-        type=IndicatorType.THINKING,
-        message="думает...",
-        emoji="🤔"
-    ),
-    IndicatorType.PROCESSING: StreamingIndicator(
-        type=IndicatorType.PROCESSING,
-        message="обрабатывает запрос...",
-        emoji="⚙️"
-    ),
-    IndicatorType.GENERATING: StreamingIndicator(
-        type=IndicatorType.GENERATING,
-        message="генерирует ответ...",
-        emoji="🧠"
-    ),
-    IndicatorType.COMPLETED: StreamingIndicator(
-        type=IndicatorType.COMPLETED,
-        message="готово!",
-        emoji="✅"
-    ),
-    IndicatorType.ERROR: StreamingIndicator(
-        type=IndicatorType.ERROR,
-        message="ошибка!",
-        emoji="❌"
-    )
-}
+def _format_indicator_text(indicator_type: IndicatorType,
+                           custom_message: Optional[str] = None) -> str:
+    """Формирует текст индикатора, используя готовую строку для дефолтного сообщения"""
+    if not custom_message:
+        return indicator_type.text
+    return f"{indicator_type.emoji} {custom_message}"
 
 # ---------- Менеджер индикаторов ----------
 class IndicatorManager:
+    """Менеджер индикаторов по сессиям.
+    
+    Блокировки нет: запросы одной сессии обрабатываются последовательно,
+    поэтому один session_id никогда не трогают два потока одновременно.
+    Для разных сессий хватает атомарности pop/get у dict под GIL.
+    """
+    
     def __init__(self):
         self.active_indicators: Dict[str, StreamingIndicator] = {}
         self.indicator_callbacks: Dict[str, Callable] = {}
-        self.lock = threading.Lock()
     
     def start_indicator(self, session_id: str, indicator_type: IndicatorType, 
                        custom_message: Optional[str] = None) -> str:
         """Запускает индикатор для сессии"""
-        with self.lock:
-            if session_id in self.active_indicators:
-                # Останавливаем предыдущий индикатор
-                self.stop_indicator(session_id)
-            
-            # Создаем новый индикатор
-            indicator = DEFAULT_INDICATORS[indicator_type]
-            indicator.start()
-            
-            if custom_message:
-                indicator.message = custom_message
-            
-            self.active_indicators[session_id] = indicator
-            
-            # Формируем текст индикатора
-            indicator_text = f"{indicator.emoji} {indicator.message}"
-            
-            return indicator_text
+        # Создаем новый индикатор для сессии
+        indicator = StreamingIndicator(
+            type=indicator_type,
+            message=custom_message or indicator_type.message,
+            emoji=indicator_type.emoji
+        )
+        indicator.start()
+        
+        # Заменяем предыдущий индикатор: между pop и записью нет другой работы
+        previous = self.active_indicators.pop(session_id, None)
+        self.active_indicators[session_id] = indicator
+        
+        # Останавливаем предыдущий индикатор уже после замены
+        if previous is not None:
+            previous.stop()
+        
+        return _format_indicator_text(indicator_type, custom_message)
     
     def update_indicator(self, session_id: str, indicator_type: IndicatorType,
                         custom_message: Optional[str] = None) -> str:
         """Обновляет индикатор"""
-        with self.lock:
-            if session_id not in self.active_indicators:
-                return self.start_indicator(session_id, indicator_type, custom_message)
-            
-            indicator = self.active_indicators[session_id]
-            indicator.type = indicator_type
-            
-            if custom_message:
-                indicator.message = custom_message
-            else:
-                # Если пользовательское сообщение не передано, используем дефолтное для нового типа
-                indicator.message = DEFAULT_INDICATORS[indicator_type].message
-            
-            # Обновляем эмодзи
-            indicator.emoji = DEFAULT_INDICATORS[indicator_type].emoji
-            
-            indicator_text = f"{indicator.emoji} {indicator.message}"
-            return indicator_text
+        indicator = self.active_indicators.get(session_id)
+        if indicator is None:
+            return self.start_indicator(session_id, indicator_type, custom_message)
+        
+        indicator.type = indicator_type
+        
+        # Если пользовательское сообщение не передано, используем дефолтное для нового типа
+        indicator.message = custom_message or indicator_type.message
+        indicator.emoji = indicator_type.emoji
+        
+        return _format_indicator_text(indicator_type, custom_message)
     
     def stop_indicator(self, session_id: str) -> Optional[str]:
         """Останавливает индикатор"""
-        with self.lock:
-            if session_id not in self.active_indicators:
-                return None
-            
-            indicator = self.active_indicators[session_id]
-            indicator.stop()
-            
-            # Удаляем индикатор
-            del self.active_indicators[session_id]
-            
-            # Возвращаем финальное сообщение
-            return f"{indicator.emoji} {indicator.message}"
+        indicator = self.active_indicators.pop(session_id, None)
+        if indicator is None:
+            return None
+        
+        indicator.stop()
+        
+        # Возвращаем финальное сообщение
+        return f"{indicator.emoji} {indicator.message}"
     
     def get_indicator_status(self, session_id: str) -> Optional[StreamingIndicator]:
         """Получает статус индикатора"""
-        with self.lock:
-            return self.active_indicators.get(session_id)
+        return self.active_indicators.get(session_id)
     
     def is_indicator_active(self, session_id: str) -> bool:
         """Проверяет, активен ли индикатор"""
-        with self.lock:
-            return session_id in self.active_indicators
+        return session_id in self.active_indicators
 
 # Глобальный менеджер индикаторов
 indicator_manager = IndicatorManager()
@@ -181,4 +164,4 @@ def show_error_indicator(session_id: str, custom_message: Optional[str] = None)
 
 def hide_indicator(session_id: str) -> Optional[str]:
     """Скрывает индикатор"""
-    return indicator_manager.stop_indicator(session_id)
\ No newline at end of file
+    return indicator_manager.stop_indicator(session_id)
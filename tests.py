@@ -2,8 +2,19 @@
 Unit тесты для всех модулей бота
 """
 import unittest
+import copy
+import dataclasses
+import datetime
+import enum
+import functools
+import importlib
+import importlib.util
 import json
+import math
+import random
+import tempfile
 import time
+import uuid
 from unittest.mock import Mock, patch, MagicMock
 import sys
 import os
@@ -11,36 +22,43 @@ import os
 # Добавляем текущую директорию в путь для импорта модулей
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Импортируем модули для тестирования
-try:
-    import ai
-    import admin
-    import monitoring
-    import games
-    import content
-    import streaming
-    import utils
-    import config
-except ImportError as e:
-    print(f"Warning: Could not import module: {e}")
+# Проверяем наличие модулей без импорта: отсутствующие пропускают свои классы тестов
+REQUIRED_MODULES = ("ai", "admin", "monitoring", "games", "content", "streaming", "utils", "config")
+MISSING_MODULES = {name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None}
+
+def _requires(*names: str):
+    """Пропускает класс тестов, если какого-то из модулей нет"""
+    missing = [name for name in names if name in MISSING_MODULES]
+    return unittest.skipIf(missing, f"Модули не найдены: {', '.join(missing)}")
+
+@functools.lru_cache(maxsize=None)
+def _import_module(name: str):
+    """Импортирует модуль бота при первом обращении"""
+    return importlib.import_module(name)
 
 # ---------- Тесты AI модуля ----------
+@_requires("ai")
 class TestAIModule(unittest.TestCase):
     """Тесты для AI модуля"""
     
-    def setUp(self):
-        """Подготовка к тестам"""
-        self.runtime_settings = ai.RuntimeAISettings()
+    @classmethod
+    def setUpClass(cls):
+        """Импортирует тестируемый модуль"""
+        cls.ai = _import_module("ai")
+        # Настройки только читаются; тесты, которые их меняют, работают с копией
+        cls.runtime_settings = cls.ai.RuntimeAISettings()
     
     def test_runtime_settings_defaults(self):
         """Тест значений по умолчанию"""
-        self.assertEqual(self.runtime_settings.temperature, 0.6)
-        self.assertEqual(self.runtime_settings.top_p, 1.0)
-        self.assertEqual(self.runtime_settings.max_tokens_or, 80)
-        self.assertEqual(self.runtime_settings.max_tokens_at, 5000)
-        self.assertFalse(self.runtime_settings.reasoning_enabled)
-        self.assertEqual(self.runtime_settings.max_history, 8)
-        self.assertEqual(self.runtime_settings.max_ai_chars, 380)
+        settings = self.runtime_settings
+        assert_equal = self.assertEqual
+        assert_equal(settings.temperature, 0.6)
+        assert_equal(settings.top_p, 1.0)
+        assert_equal(settings.max_tokens_or, 80)
+        assert_equal(settings.max_tokens_at, 5000)
+        self.assertFalse(settings.reasoning_enabled)
+        assert_equal(settings.max_history, 8)
+        assert_equal(settings.max_ai_chars, 380)
     
     def test_runtime_settings_to_dict(self):
         """Тест конвертации в словарь"""
@@ -57,40 +75,41 @@ class TestAIModule(unittest.TestCase):
             'max_tokens_or': 100,
             'max_ai_chars': 500
         }
-        self.runtime_settings.from_dict(test_data)
-        self.assertEqual(self.runtime_settings.temperature, 1.0)
-        self.assertEqual(self.runtime_settings.max_tokens_or, 100)
-        self.assertEqual(self.runtime_settings.max_ai_chars, 500)
+        runtime_settings = copy.copy(self.runtime_settings)
+        runtime_settings.from_dict(test_data)
+        self.assertEqual(runtime_settings.temperature, 1.0)
+        self.assertEqual(runtime_settings.max_tokens_or, 100)
+        self.assertEqual(runtime_settings.max_ai_chars, 500)
     
     def test_ai_health_checker(self):
         """Тест health checker"""
-        health_checker = ai.AIHealthChecker()
+        health_checker = self.ai.AIHealthChecker()
         self.assertIsInstance(health_checker.health_data, dict)
         self.assertEqual(health_checker.circuit_breaker_threshold, 5)
         self.assertEqual(health_checker.circuit_breaker_timeout, 300)
     
     def test_circuit_breaker(self):
         """Тест circuit breaker"""
-        cb = ai.CircuitBreaker(failure_threshold=2, recovery_timeout=1)
+        cb = self.ai.CircuitBreaker(failure_threshold=2, recovery_timeout=1)
         self.assertEqual(cb.state, "CLOSED")
         self.assertEqual(cb.failure_count, 0)
     
     def test_http_session_pool(self):
         """Тест HTTP session pool"""
-        pool = ai.HTTPSessionPool()
+        pool = self.ai.HTTPSessionPool()
         session = pool.get_session("test_provider")
         self.assertIsInstance(session, type(pool.get_session("test_provider")))
     
     def test_rate_limiter(self):
         """Тест rate limiter"""
-        limiter = ai.RateLimiter(max_requests=2, window=60)
+        limiter = self.ai.RateLimiter(max_requests=2, window=60)
         self.assertTrue(limiter.is_allowed("user1"))
         self.assertTrue(limiter.is_allowed("user1"))
         self.assertFalse(limiter.is_allowed("user1"))
     
     def test_response_cache(self):
         """Тест response cache"""
-        cache = ai.ResponseCache(max_size=2, ttl=1)
+        cache = self.ai.ResponseCache(max_size=2, ttl=1)
         cache.set("key1", "value1")
         cache.set("key2", "value2")
         self.assertEqual(cache.get("key1"), "value1")
@@ -102,7 +121,7 @@ class TestAIModule(unittest.TestCase):
     
     def test_content_filter(self):
         """Тест content filter"""
-        filter_instance = ai.content_filter
+        filter_instance = self.ai.content_filter
         text = "Это нормальный текст"
         filtered_text, warnings = filter_instance.filter_content(text)
         self.assertEqual(filtered_text, text)
@@ -117,7 +136,7 @@ class TestAIModule(unittest.TestCase):
     def test_clamp_text(self):
         """Тест обрезки текста"""
         long_text = "Это очень длинный текст который нужно обрезать до определенной длины"
-        clamped = ai.clamp_text(long_text, max_chars=20)
+        clamped = self.ai.clamp_text(long_text, max_chars=20)
         self.assertLessEqual(len(clamped), 20)
         self.assertIn("...", clamped)
     
@@ -130,66 +149,75 @@ class TestAIModule(unittest.TestCase):
             {"role": "user", "content": "Как дела?"},
             {"role": "assistant", "content": "Хорошо!"}
         ]
-        summarized = ai.summarize_history(history, max_tokens=50)
+        summarized = self.ai.summarize_history(history, max_tokens=50)
         self.assertLessEqual(len(summarized), len(history))
 
 # ---------- Тесты Admin модуля ----------
+@_requires("admin")
 class TestAdminModule(unittest.TestCase):
     """Тесты для Admin модуля"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Импортирует тестируемый модуль"""
+        cls.admin = _import_module("admin")
+        cls.model_search = cls.admin.ModelSearch()
+    
     def test_user_roles(self):
         """Тест системы ролей"""
-        self.assertEqual(admin.UserRole.USER.value, "user")
-        self.assertEqual(admin.UserRole.ADMIN.value, "admin")
-        self.assertEqual(admin.UserRole.SUPER_ADMIN.value, "super_admin")
+        self.assertEqual(self.admin.UserRole.USER.value, "user")
+        self.assertEqual(self.admin.UserRole.ADMIN.value, "admin")
+        self.assertEqual(self.admin.UserRole.SUPER_ADMIN.value, "super_admin")
     
     def test_user_profile(self):
         """Тест профиля пользователя"""
-        profile = admin.UserProfile(
+        profile = self.admin.UserProfile(
             user_id=123,
-            role=admin.UserRole.ADMIN
+            role=self.admin.UserRole.ADMIN
         )
         self.assertEqual(profile.user_id, 123)
-        self.assertEqual(profile.role, admin.UserRole.ADMIN)
+        self.assertEqual(profile.role, self.admin.UserRole.ADMIN)
         self.assertEqual(profile.temperature, 0.6)
     
     def test_chat_settings(self):
         """Тест настроек чата"""
-        chat_settings = admin.ChatSettings(chat_id=456)
+        chat_settings = self.admin.ChatSettings(chat_id=456)
         self.assertEqual(chat_settings.chat_id, 456)
         self.assertEqual(chat_settings.ai_provider, "AUTO")
         self.assertEqual(chat_settings.temperature, 0.6)
     
     def test_ai_presets(self):
         """Тест AI пресетов"""
-        presets = admin.AIPresets.list_presets()
-        self.assertIn("Коротко", presets)
-        self.assertIn("Детально", presets)
-        self.assertIn("Дешево", presets)
-        self.assertIn("Креативно", presets)
+        presets = self.admin.AIPresets.list_presets()
+        self.assertLessEqual({"Коротко", "Детально", "Дешево", "Креативно"}, set(presets))
         
         # Тест применения пресета
-        preset = admin.AIPresets.get_preset("Коротко")
+        preset = self.admin.AIPresets.get_preset("Коротко")
         self.assertIsInstance(preset, dict)
-        self.assertIn("temperature", preset)
-        self.assertIn("max_tokens", preset)
+        self.assertLessEqual({"temperature", "max_tokens"}, preset.keys())
     
     def test_paginator(self):
         """Тест пагинации"""
-        items = list(range(25))  # 25 элементов
-        paginator = admin.Paginator(items, page_size=10)
+        items = range(25)  # 25 элементов, любая последовательность подходит
+        paginator = self.admin.Paginator(items, page_size=10)
         
-        self.assertEqual(paginator.total_pages, 3)
+        # Число страниц — округление 25 / 10 вверх
+        self.assertEqual(paginator.total_pages, -(-25 // 10))
         
         page1, current, total, count = paginator.get_page(0)
         self.assertEqual(len(page1), 10)
         self.assertEqual(current, 0)
         self.assertEqual(total, 3)
         self.assertEqual(count, 25)
+        
+        # Последняя страница неполная
+        last_page, current, _, _ = paginator.get_page(2)
+        self.assertEqual(len(last_page), 25 % 10)
+        self.assertEqual(current, 2)
     
     def test_model_search(self):
         """Тест поиска моделей"""
-        search = admin.ModelSearch()
+        search = self.model_search
         all_models = search.get_all()
         self.assertGreater(len(all_models), 0)
         
@@ -197,14 +225,28 @@ class TestAdminModule(unittest.TestCase):
         results = search.search("deepseek")
         self.assertGreater(len(results), 0)
         self.assertTrue(all("deepseek" in model.lower() for model in results))
+        
+        # Поиск не зависит от регистра запроса
+        self.assertEqual(search.search("DeepSeek"), results)
+        
+        # Замена списка моделей обновляет индекс поиска
+        custom = self.admin.ModelSearch()
+        custom.models = [*custom.models, "Mistral-Small"]
+        self.assertEqual(custom.search("mistral"), ["Mistral-Small"])
 
 # ---------- Тесты Monitoring модуля ----------
+@_requires("monitoring")
 class TestMonitoringModule(unittest.TestCase):
     """Тесты для Monitoring модуля"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Импортирует тестируемый модуль"""
+        cls.monitoring = _import_module("monitoring")
+    
     def test_metric(self):
         """Тест метрики"""
-        metric = monitoring.Metric(
+        metric = self.monitoring.Metric(
             name="test_metric",
             value=42.0,
             timestamp=time.time(),
@@ -216,7 +258,7 @@ class TestMonitoringModule(unittest.TestCase):
     
     def test_metrics_collector(self):
         """Тест коллектора метрик"""
-        collector = monitoring.MetricsCollector()
+        collector = self.monitoring.MetricsCollector()
         
         # Тест счетчиков
         collector.increment_counter("test_counter")
@@ -236,7 +278,7 @@ class TestMonitoringModule(unittest.TestCase):
     
     def test_health_checker(self):
         """Тест health checker"""
-        health_checker = monitoring.HealthChecker()
+        health_checker = self.monitoring.HealthChecker()
         health_status = health_checker.check_health()
         self.assertIsInstance(health_status, dict)
         
@@ -244,12 +286,26 @@ class TestMonitoringModule(unittest.TestCase):
         self.assertIn(overall_status, ["healthy", "degraded", "unhealthy", "unknown"])
 
 # ---------- Тесты Games модуля ----------
+GAMES_RANDOM_SEED = 0xC0FFEE
+
+@_requires("games")
 class TestGamesModule(unittest.TestCase):
     """Тесты для Games модуля"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Импортирует тестируемый модуль"""
+        cls.games = _import_module("games")
+    
+    def setUp(self):
+        """Фиксирует генератор случайных чисел для воспроизводимых партий"""
+        # Восстанавливаем состояние после теста, чтобы не влиять на другие классы
+        self.addCleanup(random.setstate, random.getstate())
+        random.seed(GAMES_RANDOM_SEED)
+    
     def test_guess_number_session(self):
         """Тест игры 'Угадай число'"""
-        session = games.GuessNumberSession(creator_id=123)
+        session = self.games.GuessNumberSession(creator_id=123)
         self.assertEqual(session.creator_id, 123)
         self.assertFalse(session.started)
         self.assertEqual(session.attempts, 0)
@@ -259,16 +315,23 @@ class TestGamesModule(unittest.TestCase):
         self.assertTrue(session.started)
         self.assertGreater(session.start_time, 0)
         
-        # Тест угадывания
-        result, is_finished = session.guess(123, session.number)
-        if is_finished:
-            self.assertIn("Поздравляем", result)
-        else:
-            self.assertIn("Больше" if session.number > session.number else "Меньше", result)
+        # Тест угадывания: фиксируем число, чтобы проверить все ветки
+        session.number = 50
+        result, is_finished = session.guess(123, 40)
+        self.assertFalse(is_finished)
+        self.assertIn("Больше", result)
+        
+        result, is_finished = session.guess(123, 60)
+        self.assertFalse(is_finished)
+        self.assertIn("Меньше", result)
+        
+        result, is_finished = session.guess(123, 50)
+        self.assertTrue(is_finished)
+        self.assertIn("Поздравляем", result)
     
     def test_squid_game_session(self):
         """Тест игры 'Кальмар'"""
-        session = games.SquidGameSession()
+        session = self.games.SquidGameSession()
         self.assertEqual(len(session.players), 0)
         self.assertFalse(session.started)
         
@@ -284,7 +347,7 @@ class TestGamesModule(unittest.TestCase):
     
     def test_quiz_session(self):
         """Тест викторины"""
-        session = games.QuizSession()
+        session = self.games.QuizSession()
         self.assertEqual(len(session.players), 0)
         self.assertFalse(session.started)
         
@@ -296,7 +359,7 @@ class TestGamesModule(unittest.TestCase):
     
     def test_mafia_session(self):
         """Тест игры 'Мафия'"""
-        session = games.MafiaSession()
+        session = self.games.MafiaSession()
         self.assertEqual(len(session.players), 0)
         self.assertEqual(session.phase, "waiting")
         
@@ -312,12 +375,20 @@ class TestGamesModule(unittest.TestCase):
         self.assertEqual(session.phase, "night")
 
 # ---------- Тесты Content модуля ----------
+@_requires("content")
 class TestContentModule(unittest.TestCase):
     """Тесты для Content модуля"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Импортирует тестируемый модуль"""
+        cls.content = _import_module("content")
+        cls.boosters = cls.content.BoosterShop.list_boosters()
+        cls.tasks = cls.content.DailyTasks.list_tasks()
+    
     def test_user_wallet(self):
         """Тест кошелька пользователя"""
-        wallet = content.UserWallet(user_id=123)
+        wallet = self.content.UserWallet(user_id=123)
         self.assertEqual(wallet.user_id, 123)
         self.assertEqual(wallet.balance, 0.0)
         self.assertEqual(wallet.currency, "RUB")
@@ -336,7 +407,7 @@ class TestContentModule(unittest.TestCase):
     
     def test_ai_booster(self):
         """Тест AI бустера"""
-        booster = content.AIBooster(
+        booster = self.content.AIBooster(
             id="test_boost",
             name="Test Boost",
             description="Test description",
@@ -352,7 +423,7 @@ class TestContentModule(unittest.TestCase):
     
     def test_daily_task(self):
         """Тест ежедневного задания"""
-        task = content.DailyTask(
+        task = self.content.DailyTask(
             id="test_task",
             name="Test Task",
             description="Test description",
@@ -370,44 +441,50 @@ class TestContentModule(unittest.TestCase):
     
     def test_booster_shop(self):
         """Тест магазина бустеров"""
-        boosters = content.BoosterShop.list_boosters()
+        boosters = self.boosters
         self.assertGreater(len(boosters), 0)
         
         # Проверяем наличие основных бустеров
-        booster_names = [b.name for b in boosters]
-        self.assertIn("Fast Lane", booster_names)
-        self.assertIn("Token Boost", booster_names)
-        self.assertIn("Speed Boost", booster_names)
-        self.assertIn("Quality Boost", booster_names)
+        booster_names = {b.name for b in boosters}
+        self.assertLessEqual({"Fast Lane", "Token Boost", "Speed Boost", "Quality Boost"}, booster_names)
     
     def test_daily_tasks(self):
         """Тест ежедневных заданий"""
-        tasks = content.DailyTasks.list_tasks()
+        tasks = self.tasks
         self.assertGreater(len(tasks), 0)
         
         # Проверяем наличие основных заданий
-        task_names = [t.name for t in tasks]
-        self.assertIn("AI Чат x5", task_names)
-        self.assertIn("Игрок", task_names)
-        self.assertIn("Ежедневный вход", task_names)
+        task_names = {t.name for t in tasks}
+        self.assertLessEqual({"AI Чат x5", "Игрок", "Ежедневный вход"}, task_names)
 
 # ---------- Тесты Streaming модуля ----------
+@_requires("streaming")
 class TestStreamingModule(unittest.TestCase):
     """Тесты для Streaming модуля"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Импортирует тестируемый модуль"""
+        cls.streaming = _import_module("streaming")
+    
     def test_indicator_type(self):
         """Тест типов индикаторов"""
-        self.assertEqual(streaming.IndicatorType.TYPING.value, "typing")
-        self.assertEqual(streaming.IndicatorType.THINKING.value, "thinking")
-        self.assertEqual(streaming.IndicatorType.PROCESSING.value, "processing")
-        self.assertEqual(streaming.IndicatorType.GENERATING.value, "generating")
-        self.assertEqual(streaming.IndicatorType.COMPLETED.value, "completed")
-        self.assertEqual(streaming.IndicatorType.ERROR.value, "error")
+        # Сравнение целиком заодно ловит лишние типы
+        expected = {
+            "TYPING": "typing",
+            "THINKING": "thinking",
+            "PROCESSING": "processing",
+            "GENERATING": "generating",
+            "COMPLETED": "completed",
+            "ERROR": "error",
+        }
+        got = {t.name: t.value for t in self.streaming.IndicatorType}
+        self.assertEqual(got, expected)
     
     def test_streaming_indicator(self):
         """Тест индикатора стриминга"""
-        indicator = streaming.StreamingIndicator(
-            type=streaming.IndicatorType.TYPING,
+        indicator = self.streaming.StreamingIndicator(
+            type=self.streaming.IndicatorType.TYPING,
             message="Test message",
             emoji="🧪"
         )
@@ -427,16 +504,16 @@ class TestStreamingModule(unittest.TestCase):
     
     def test_indicator_manager(self):
         """Тест менеджера индикаторов"""
-        manager = streaming.IndicatorManager()
+        manager = self.streaming.IndicatorManager()
         session_id = "test_session"
         
         # Тест запуска индикатора
-        result = manager.start_indicator(session_id, streaming.IndicatorType.TYPING)
+        result = manager.start_indicator(session_id, self.streaming.IndicatorType.TYPING)
         self.assertIn("набирает текст", result)
         self.assertTrue(manager.is_indicator_active(session_id))
         
         # Тест обновления индикатора
-        result = manager.update_indicator(session_id, streaming.IndicatorType.THINKING)
+        result = manager.update_indicator(session_id, self.streaming.IndicatorType.THINKING)
         self.assertIn("думает", result)
         
         # Тест остановки индикатора
@@ -444,79 +521,220 @@ class TestStreamingModule(unittest.TestCase):
         self.assertIn("думает", result)
         self.assertFalse(manager.is_indicator_active(session_id))
 
+    def test_indicator_manager_restart(self):
+        """Тест повторного запуска и обновления без активного индикатора"""
+        manager = self.streaming.IndicatorManager()
+
+        # Повторный запуск заменяет предыдущий индикатор
+        manager.start_indicator("s1", self.streaming.IndicatorType.TYPING)
+        result = manager.start_indicator("s1", self.streaming.IndicatorType.PROCESSING)
+        self.assertIn("обрабатывает запрос", result)
+
+        # Обновление несуществующего индикатора запускает новый
+        result = manager.update_indicator("s2", self.streaming.IndicatorType.ERROR)
+        self.assertIn("ошибка", result)
+        self.assertTrue(manager.is_indicator_active("s2"))
+
+        # Остановка несуществующего индикатора
+        self.assertIsNone(manager.stop_indicator("missing"))
+
+    def test_indicator_sessions_isolated(self):
+        """Тест независимости индикаторов разных сессий"""
+        manager = self.streaming.IndicatorManager()
+        manager.start_indicator("s1", self.streaming.IndicatorType.TYPING, "пишет ответ")
+        result = manager.start_indicator("s2", self.streaming.IndicatorType.TYPING)
+
+        self.assertIn("набирает текст", result)
+        self.assertIsNot(manager.get_indicator_status("s1"), manager.get_indicator_status("s2"))
+        self.assertEqual(self.streaming.IndicatorType.TYPING.message, "набирает текст...")
+
+    def test_indicator_shortcuts(self):
+        """Тест функций-ярлыков для индикаторов"""
+        session_id = "shortcut_session"
+        self.assertIn("думает", self.streaming.show_thinking_indicator(session_id))
+        # Пользовательское сообщение можно передать и позиционно
+        result = self.streaming.show_completed_indicator(session_id, "все!")
+        self.assertEqual(result, "✅ все!")
+        self.assertEqual(self.streaming.hide_indicator(session_id), "✅ все!")
+        self.assertIsNone(self.streaming.hide_indicator(session_id))
+
 # ---------- Тесты Utils модуля ----------
+# Дайджесты строки "test_string"
+EXPECTED_MD5 = "3474851a3410906697ec77337df7aae4"
+EXPECTED_SHA256 = "4b641e9a923d1ea57e18fe41dcb543e2c4005c41ff210864a710b0fbb2654c11"
+
+@_requires("utils")
 class TestUtilsModule(unittest.TestCase):
     """Тесты для Utils модуля"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Импортирует тестируемый модуль"""
+        cls.utils = _import_module("utils")
+    
     def test_validation_functions(self):
         """Тест функций валидации"""
-        # Email валидация
-        self.assertTrue(utils.validate_email("test@example.com"))
-        self.assertFalse(utils.validate_email("invalid-email"))
-        
-        # Phone валидация
-        self.assertTrue(utils.validate_phone("+7 999 123-45-67"))
-        self.assertFalse(utils.validate_phone("123"))
-        
-        # JSON валидация
-        self.assertTrue(utils.validate_json('{"key": "value"}'))
-        self.assertFalse(utils.validate_json('invalid json'))
+        cases = [
+            # Email валидация
+            (self.utils.validate_email, "test@example.com", True),
+            (self.utils.validate_email, "invalid-email", False),
+            # Phone валидация
+            (self.utils.validate_phone, "+7 999 123-45-67", True),
+            (self.utils.validate_phone, "123", False),
+            # JSON валидация
+            (self.utils.validate_json, '{"key": "value"}', True),
+            (self.utils.validate_json, 'invalid json', False),
+        ]
+        for validator, value, expected in cases:
+            with self.subTest(validator=validator.__name__, value=value):
+                self.assertEqual(validator(value), expected)
     
     def test_text_utilities(self):
         """Тест текстовых утилит"""
         # Санитизация текста
         dirty_text = "<script>alert('xss')</script>   много   пробелов"
-        clean_text = utils.sanitize_text(dirty_text)
+        clean_text = self.utils.sanitize_text(dirty_text)
         self.assertNotIn("<script>", clean_text)
         self.assertNotIn("   ", clean_text)
         
+        # Удаление тегов, в том числе многострочных
+        self.assertEqual(self.utils.remove_html_tags('<b>жирный</b> <a\nhref="x">ссылка</a>'),
+                         "жирный ссылка")
+        
         # Обрезка текста
         long_text = "Это очень длинный текст для тестирования обрезки"
-        truncated = utils.truncate_text(long_text, 20)
+        truncated = self.utils.truncate_text(long_text, 20)
         self.assertLessEqual(len(truncated), 20)
         self.assertIn("...", truncated)
         
         # Подсчет слов
-        word_count = utils.count_words("Это тестовый текст")
+        word_count = self.utils.count_words("Это тестовый текст")
         self.assertEqual(word_count, 3)
+        self.assertEqual(self.utils.count_words("Кот — друг"), 3)
+        self.assertEqual(self.utils.count_words("Кот — друг", unicode=True), 2)
         
         # Подсчет символов
-        char_count = utils.count_characters("Тест", include_spaces=False)
+        char_count = self.utils.count_characters("Тест", include_spaces=False)
         self.assertEqual(char_count, 4)
     
+    def test_extract_functions(self):
+        """Тест извлечения URL и email"""
+        text = 'Сайт https://example.com/a?b=1#x, зеркало (http://foo.bar/baz).'
+        self.assertEqual(
+            self.utils.extract_urls(text),
+            ["https://example.com/a?b=1#x", "http://foo.bar/baz"]
+        )
+        
+        # Символ '|' не входит в домен верхнего уровня
+        text = "Пишите на a.b@example.com или x@y.c|om"
+        self.assertEqual(self.utils.extract_emails(text), ["a.b@example.com"])
+    
     def test_hash_functions(self):
         """Тест функций хеширования"""
         test_data = "test_string"
         
-        # MD5
-        md5_hash = utils.generate_hash(test_data, "md5")
-        self.assertEqual(len(md5_hash), 32)
-        self.assertTrue(utils.verify_hash(test_data, md5_hash, "md5"))
-        
-        # SHA256
-        sha256_hash = utils.generate_hash(test_data, "sha256")
-        self.assertEqual(len(sha256_hash), 64)
-        self.assertTrue(utils.verify_hash(test_data, sha256_hash, "sha256"))
+        # Сверяем с заранее вычисленными дайджестами, а не только длину
+        self.assertEqual(self.utils.generate_hash(test_data, "md5"), EXPECTED_MD5)
+        self.assertEqual(self.utils.generate_hash(test_data, "sha256"), EXPECTED_SHA256)
+        
+        # Проверка хеша
+        self.assertTrue(self.utils.verify_hash(test_data, EXPECTED_SHA256, "sha256"))
+        self.assertFalse(self.utils.verify_hash(test_data, EXPECTED_MD5, "sha256"))
+        self.assertFalse(self.utils.verify_hash(test_data, "привет", "sha256"))
+    
+    def test_json_files(self):
+        """Тест сохранения и загрузки JSON (с orjson и без него)"""
+        data = {"имя": "Кот", "уровень": 3, 1: [1.5, None]}
+        expected = {"имя": "Кот", "уровень": 3, "1": [1.5, None]}
+        # То, что orjson не умеет: такие данные должны уходить в json без потерь
+        special = {"big": 2 ** 70, "neg": -2 ** 63 - 1, "inf": float("inf"), "nan": float("nan")}
+        backends = (True, False) if self.utils.ORJSON_AVAILABLE else (False,)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.json")
+            for use_orjson in backends:
+                with patch.object(self.utils, "ORJSON_AVAILABLE", use_orjson):
+                    for indent in (2, 4, None):
+                        with self.subTest(orjson=use_orjson, indent=indent):
+                            self.assertTrue(self.utils.save_json_file(data, path, indent=indent))
+                            with open(path, encoding="utf-8") as f:
+                                self.assertIn("Кот", f.read())
+                            self.assertEqual(self.utils.load_json_file(path), expected)
+                            
+                            self.assertTrue(self.utils.save_json_file(special, path, indent=indent))
+                            loaded = self.utils.load_json_file(path)
+                            self.assertEqual(loaded["big"], 2 ** 70)
+                            self.assertEqual(loaded["neg"], -2 ** 63 - 1)
+                            self.assertEqual(loaded["inf"], float("inf"))
+                            self.assertTrue(math.isnan(loaded["nan"]))
+                    
+                    # Файл, записанный json.dump с NaN, читается, а не подменяется default
+                    with self.subTest(orjson=use_orjson, source="json.dump"):
+                        with open(path, "w", encoding="utf-8") as f:
+                            json.dump({"nan": float("nan"), "big": 2 ** 70, "neg": -2 ** 63 - 1}, f)
+                        loaded = self.utils.load_json_file(path, default={})
+                        self.assertTrue(math.isnan(loaded["nan"]))
+                        self.assertEqual(loaded["big"], 2 ** 70)
+                        self.assertEqual(loaded["neg"], -2 ** 63 - 1)
+                        
+                        # 19 цифр без других длинных чисел рядом: orjson вернул бы float
+                        with open(path, "w", encoding="utf-8") as f:
+                            json.dump([-2 ** 63 - 1], f)
+                        self.assertEqual(self.utils.load_json_file(path), [-2 ** 63 - 1])
+                    
+                    # Типы, которые json не сериализует, не сохраняются ни одним бэкендом
+                    for value in (datetime.datetime(2024, 1, 1), uuid.uuid4(),
+                                  dataclasses.make_dataclass("Point", ["x"])(1),
+                                  enum.Enum("Color", "RED").RED):
+                        with self.subTest(orjson=use_orjson, value=type(value).__name__):
+                            self.assertFalse(self.utils.save_json_file({"value": value}, path))
+            
+            missing = os.path.join(tmp, "missing.json")
+            self.assertEqual(self.utils.load_json_file(missing, default={}), {})
+    
+    def test_file_hash(self):
+        """Тест хеширования файла"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.txt")
+            with open(path, "wb") as f:
+                f.write(b"test_string")
+            
+            self.assertEqual(self.utils.generate_file_hash(path, "md5"), EXPECTED_MD5)
+            self.assertEqual(self.utils.generate_file_hash(path), EXPECTED_SHA256)
+            with self.assertRaises(ValueError):
+                self.utils.generate_file_hash(path, "crc32")
     
     def test_time_utilities(self):
         """Тест временных утилит"""
-        now = time.time()
-        
-        # Форматирование timestamp
-        formatted = utils.format_timestamp(now)
-        self.assertIsInstance(formatted, str)
-        
-        # Проверка недавности
-        self.assertTrue(utils.is_recent(now, 3600))
-        self.assertFalse(utils.is_recent(now - 7200, 3600))
-        
-        # Время назад
-        time_ago = utils.get_time_ago(now - 300)  # 5 минут назад
-        self.assertIn("мин назад", time_ago)
+        # Замораживаем часы, чтобы сравнения не зависели от реального времени
+        now = 1_700_000_000.0
+        with patch.object(self.utils.time, "time", return_value=now):
+            # Форматирование timestamp
+            formatted = self.utils.format_timestamp(now)
+            self.assertIsInstance(formatted, str)
+            
+            # Проверка недавности
+            self.assertTrue(self.utils.is_recent(now, 3600))
+            self.assertFalse(self.utils.is_recent(now - 7200, 3600))
+            
+            # Время назад
+            self.assertEqual(self.utils.get_time_ago(now - 300), "5 мин назад")
+            self.assertEqual(self.utils.get_time_ago(now - 59), "только что")
+            self.assertEqual(self.utils.get_time_ago(now - 2592000), "1 мес назад")
+        
+        # Явный now: часы не читаются, все метки считаются от одного момента
+        with patch.object(self.utils.time, "time", side_effect=AssertionError):
+            self.assertEqual([self.utils.get_time_ago(now - d, now) for d in (10, 7200)],
+                             ["только что", "2 ч назад"])
+            self.assertFalse(self.utils.is_recent(now - 7200, 3600, now=now))
+        
+        # Длительность: граница порога относится к следующей единице
+        self.assertEqual(self.utils.format_duration(59.9), "59.9с")
+        self.assertEqual(self.utils.format_duration(60), "1.0м")
+        self.assertEqual(self.utils.format_duration(86400), "1.0д")
     
     def test_simple_cache(self):
         """Тест простого кэша"""
-        cache = utils.SimpleCache(max_size=2, ttl=1)
+        cache = self.utils.SimpleCache(max_size=2, ttl=1)
         
         # Тест установки и получения
         cache.set("key1", "value1")
@@ -527,14 +745,21 @@ class TestUtilsModule(unittest.TestCase):
         cache.set("key3", "value3")
         self.assertIsNone(cache.get("key1"))  # Должен быть удален
         
-        # Тест TTL
-        cache.set("key4", "value4")
-        time.sleep(1.1)  # Ждем истечения TTL
-        self.assertIsNone(cache.get("key4"))
+        # Тест LRU: прочитанный ключ переживает вытеснение
+        self.assertEqual(cache.get("key2"), "value2")
+        cache.set("key5", "value5")
+        self.assertEqual(cache.get("key2"), "value2")
+        self.assertIsNone(cache.get("key3"))
+        
+        # Тест TTL: подменяем часы вместо реального ожидания
+        with patch.object(self.utils.time, "monotonic_ns", return_value=1_000_000_000_000) as clock:
+            cache.set("key4", "value4")
+            clock.return_value += 1_100_000_000
+            self.assertIsNone(cache.get("key4"))
     
     def test_rate_limiter(self):
         """Тест rate limiter"""
-        limiter = utils.RateLimiter(max_requests=2, window=60)
+        limiter = self.utils.RateLimiter(max_requests=2, window=60)
         
         # Первые два запроса должны пройти
         self.assertTrue(limiter.is_allowed("user1"))
@@ -546,36 +771,58 @@ class TestUtilsModule(unittest.TestCase):
         # Сброс
         limiter.reset("user1")
         self.assertTrue(limiter.is_allowed("user1"))
+    
+    def test_rate_limiter_refill(self):
+        """Тест пополнения токенов в utils.RateLimiter"""
+        with patch.object(self.utils.time, "monotonic_ns", return_value=1_000_000_000_000) as clock:
+            limiter = self.utils.RateLimiter(max_requests=2, window=60)
+            self.assertTrue(limiter.is_allowed("user1"))
+            self.assertTrue(limiter.is_allowed("user1"))
+            self.assertFalse(limiter.is_allowed("user1"))
+            self.assertEqual(limiter.get_wait_time("user1"), 30)
+            
+            # Один токен возвращается за window / max_requests секунд
+            clock.return_value += 30_000_000_000
+            self.assertEqual(limiter.get_wait_time("user1"), 0)
+            self.assertTrue(limiter.is_allowed("user1"))
+            self.assertFalse(limiter.is_allowed("user1"))
 
 # ---------- Тесты Config модуля ----------
+@_requires("config")
 class TestConfigModule(unittest.TestCase):
     """Тесты для Config модуля"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Импортирует тестируемый модуль"""
+        cls.config = _import_module("config")
+    
     def test_bot_config_defaults(self):
         """Тест значений по умолчанию конфигурации"""
-        cfg = config.BotConfig()
-        self.assertEqual(cfg.bot_name, "CryCat Bot")
-        self.assertEqual(cfg.bot_version, "2.0.0")
-        self.assertEqual(cfg.ai_provider, "AUTO")
-        self.assertEqual(cfg.runtime_temperature, 0.6)
-        self.assertEqual(cfg.runtime_max_tokens_or, 80)
+        cfg = self.config.BotConfig()
+        assert_equal = self.assertEqual
+        assert_equal(cfg.bot_name, "CryCat Bot")
+        assert_equal(cfg.bot_version, "2.0.0")
+        assert_equal(cfg.ai_provider, "AUTO")
+        assert_equal(cfg.runtime_temperature, 0.6)
+        assert_equal(cfg.runtime_max_tokens_or, 80)
         self.assertTrue(cfg.games_enabled)
         self.assertTrue(cfg.monitoring_enabled)
     
     def test_config_to_dict(self):
         """Тест конвертации конфигурации в словарь"""
-        config_instance = config.BotConfig()
+        config_instance = self.config.BotConfig()
         config_dict = config_instance.to_dict()
         
         self.assertIsInstance(config_dict, dict)
-        self.assertIn("bot_name", config_dict)
-        self.assertIn("ai_provider", config_dict)
-        self.assertIn("runtime_temperature", config_dict)
-        self.assertIn("games_enabled", config_dict)
+        self.assertLessEqual(
+            {"bot_name", "ai_provider", "runtime_temperature", "games_enabled"},
+            config_dict.keys()
+        )
     
     def test_config_from_dict(self):
         """Тест загрузки конфигурации из словаря"""
-        config_instance = config.BotConfig()
+        config_instance = self.config.BotConfig()
         test_data = {
             "bot_name": "Test Bot",
             "runtime_temperature": 1.0,
@@ -590,61 +837,27 @@ class TestConfigModule(unittest.TestCase):
     def test_config_validation(self):
         """Тест валидации конфигурации"""
         # Валидная конфигурация
-        valid_config = config.BotConfig()
+        valid_config = self.config.BotConfig()
         valid_config.vk_group_token = "test_token"
         valid_config.vk_group_id = 123
         valid_config.admin_user_ids = [456]
         
-        errors = config.validate_config(valid_config)
+        errors = self.config.validate_config(valid_config)
         self.assertEqual(len(errors), 0)
         
         # Невалидная конфигурация
-        invalid_config = config.BotConfig()
-        errors = config.validate_config(invalid_config)
+        invalid_config = self.config.BotConfig()
+        errors = self.config.validate_config(invalid_config)
         self.assertGreater(len(errors), 0)
         self.assertIn("VK_GROUP_TOKEN is required", errors)
         self.assertIn("VK_GROUP_ID must be positive", errors)
         self.assertIn("At least one admin user ID must be specified", errors)
 
-# ---------- Основная функция запуска тестов ----------
-def run_all_tests():
-    """Запускает все тесты"""
-    # Создаем test suite
-    test_suite = unittest.TestSuite()
-    
-    # Добавляем тесты для каждого модуля
-    test_classes = [
-        TestAIModule,
-        TestAdminModule,
-        TestMonitoringModule,
-        TestGamesModule,
-        TestContentModule,
-        TestStreamingModule,
-        TestUtilsModule,
-        TestConfigModule
-    ]
-    
-    for test_class in test_classes:
-        tests = unittest.TestLoader().loadTestsFromTestCase(test_class)
-        test_suite.addTests(tests)
-    
-    # Запускаем тесты
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(test_suite)
-    
-    # Возвращаем результат
-    return result.wasSuccessful()
-
+# ---------- Запуск тестов ----------
 if __name__ == "__main__":
-    print("🧪 Запуск unit тестов для CryCat Bot v2.0.0...")
-    print("=" * 60)
-    
-    success = run_all_tests()
-    
-    print("=" * 60)
-    if success:
-        print("✅ Все тесты прошли успешно!")
-    else:
-        print("❌ Некоторые тесты не прошли!")
-    
-    print(f"Статус: {'УСПЕХ' if success else 'ОШИБКА'}")
\ No newline at end of file
+    # Баннер нужен только в терминале; в логах CI итог печатает сам unittest
+    if sys.stdout.isatty():
+        print("🧪 Запуск unit тестов для CryCat Bot v2.0.0...")
+    # Стандартный CLI unittest: python tests.py TestUtilsModule.test_simple_cache, -k, -f
+    # Построчный отчет только в терминале; в CI и при перенаправлении вывода — точки
+    unittest.main(verbosity=2 if sys.stderr.isatty() else 1, buffer=True)
@@ -0,0 +1,15 @@
+"""
+Общие проверки для тестов
+"""
+from typing import Any
+
+
+def check_cache_roundtrip(cache: Any, key: str = "test_key", value: Any = "test_value",
+                          ttl: int = 60) -> None:
+    """Проверяет запись, чтение и очистку кеша с API cache_manager"""
+    cache.set(key, value, ttl=ttl)
+    assert cache.get(key) == value
+    assert isinstance(cache.get_stats(), dict)
+    
+    cache.clear()
+    assert cache.get(key) is None
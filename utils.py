@@ -1,14 +1,31 @@
 """
 Вспомогательные утилиты
 """
+import bisect
 import json
+import os
 import time
 import hashlib
+import hmac
+import math
 import re
+import secrets
+import string
+import traceback
+import uuid
 from typing import Any, Dict, List, Optional, Union, Tuple
-from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 import logging
+from collections import OrderedDict
+from enum import Enum
+
+# orjson — необязательное ускорение для JSON файлов, без него работает json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    # Имя orjson не определено: все обращения к нему проверяют ORJSON_AVAILABLE
+    ORJSON_AVAILABLE = False
 
 # ---------- Логирование ----------
 def setup_logging(level: str = "INFO", log_file: Optional[str] = None):
@@ -26,15 +43,19 @@ def setup_logging(level: str = "INFO", log_file: Optional[str] = None):
     )
 
 # ---------- Валидация данных ----------
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_NON_DIGIT_RE = re.compile(r'\D')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
 def validate_email(email: str) -> bool:
     """Проверяет корректность email"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(_EMAIL_RE.match(email))
 
 def validate_phone(phone: str) -> bool:
     """Проверяет корректность номера телефона"""
     # Убираем все кроме цифр
-    digits_only = re.sub(r'\D', '', phone)
+    digits_only = _NON_DIGIT_RE.sub('', phone)
     return len(digits_only) >= 10
 
 def validate_json(data: str) -> bool:
@@ -51,10 +72,10 @@ def sanitize_text(text: str, max_length: int = 1000) -> str:
         return ""
     
     # Убираем HTML теги
-    text = re.sub(r'<[^>]+>', '', text)
+    text = _HTML_TAG_RE.sub('', text)
     
     # Убираем лишние пробелы
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     
     # Обрезаем по длине
     if len(text) > max_length:
@@ -63,31 +84,51 @@ def sanitize_text(text: str, max_length: int = 1000) -> str:
     return text.strip()
 
 # ---------- Хеширование и безопасность ----------
+_HASHERS = {
+    "md5": hashlib.md5,
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+    "sha512": hashlib.sha512,
+}
+
 def generate_hash(data: str, algorithm: str = "sha256") -> str:
     """Генерирует хеш от данных"""
-    if algorithm == "md5":
-        return hashlib.md5(data.encode()).hexdigest()
-    elif algorithm == "sha1":
-        return hashlib.sha1(data.encode()).hexdigest()
-    elif algorithm == "sha256":
-        return hashlib.sha256(data.encode()).hexdigest()
-    elif algorithm == "sha512":
-        return hashlib.sha512(data.encode()).hexdigest()
-    else:
+    hasher = _HASHERS.get(algorithm)
+    if hasher is None:
         raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+    return hasher(data.encode()).hexdigest()
+
+# Крупные блоки: меньше вызовов update(), и каждый отпускает GIL
+_FILE_HASH_CHUNK = 256 * 1024
+
+def generate_file_hash(path: str, algorithm: str = "sha256") -> str:
+    """Генерирует хеш содержимого файла, не загружая его в память целиком"""
+    hasher = _HASHERS.get(algorithm)
+    if hasher is None:
+        raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+    
+    with open(path, "rb") as f:
+        # Python 3.11+: цикл чтения выполняется на стороне C
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, hasher).hexdigest()
+        
+        digest = hasher()
+        for chunk in iter(lambda: f.read(_FILE_HASH_CHUNK), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
 
 def verify_hash(data: str, hash_value: str, algorithm: str = "sha256") -> bool:
     """Проверяет хеш данных"""
     expected_hash = generate_hash(data, algorithm)
-    return expected_hash == hash_value
+    # Сравнение за постоянное время, чтобы не раскрывать хеш по таймингу;
+    # байты, потому что str с не-ASCII символами compare_digest не принимает
+    return hmac.compare_digest(expected_hash.encode(), hash_value.encode())
+
+_ALPHABET = string.ascii_letters + string.digits
 
 def generate_random_string(length: int = 16) -> str:
     """Генерирует случайную строку"""
-    import secrets
-    import string
-    
-    alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
+    return ''.join(secrets.choice(_ALPHABET) for _ in range(length))
 
 def generate_api_key(prefix: str = "ccb") -> str:
     """Генерирует API ключ"""
@@ -101,50 +142,100 @@ def format_timestamp(timestamp: Union[float, int]) -> str:
     dt = datetime.fromtimestamp(timestamp)
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
+# Пороги в секундах и соответствующие им (делитель, единица)
+_DURATION_THRESHOLDS = (60, 3600, 86400)
+_DURATION_UNITS = ((1, "с"), (60, "м"), (3600, "ч"), (86400, "д"))
+
 def format_duration(seconds: float) -> str:
     """Форматирует длительность"""
-    if seconds < 60:
-        return f"{seconds:.1f}с"
-    elif seconds < 3600:
-        minutes = seconds / 60
-        return f"{minutes:.1f}м"
-    elif seconds < 86400:
-        hours = seconds / 3600
-        return f"{hours:.1f}ч"
-    else:
-        days = seconds / 86400
-        return f"{days:.1f}д"
+    divisor, unit = _DURATION_UNITS[bisect.bisect_right(_DURATION_THRESHOLDS, seconds)]
+    return f"{seconds / divisor:.1f}{unit}"
+
+def is_recent(timestamp: Union[float, int], max_age_seconds: int = 3600,
+              now: Optional[float] = None) -> bool:
+    """Проверяет, недавняя ли временная метка
+    
+    now позволяет проверить пачку меток относительно одного момента времени.
+    """
+    if now is None:
+        now = time.time()
+    return now - timestamp < max_age_seconds
 
-def is_recent(timestamp: Union[float, int], max_age_seconds: int = 3600) -> bool:
-    """Проверяет, недавняя ли временная метка"""
-    return time.time() - timestamp < max_age_seconds
+_TIME_AGO_THRESHOLDS = (60, 3600, 86400, 2592000)  # последний порог — 30 дней
+_TIME_AGO_UNITS = ((1, None), (60, "мин"), (3600, "ч"), (86400, "дн"), (2592000, "мес"))
 
-def get_time_ago(timestamp: Union[float, int]) -> str:
-    """Возвращает "время назад" в человекочитаемом формате"""
-    now = time.time()
+def get_time_ago(timestamp: Union[float, int], now: Optional[float] = None) -> str:
+    """Возвращает "время назад" в человекочитаемом формате
+    
+    При форматировании списка передайте now, вычисленный один раз на весь список.
+    """
+    if now is None:
+        now = time.time()
     diff = now - timestamp
     
-    if diff < 60:
+    divisor, unit = _TIME_AGO_UNITS[bisect.bisect_right(_TIME_AGO_THRESHOLDS, diff)]
+    if unit is None:
         return "только что"
-    elif diff < 3600:
-        minutes = int(diff / 60)
-        return f"{minutes} мин назад"
-    elif diff < 86400:
-        hours = int(diff / 3600)
-        return f"{hours} ч назад"
-    elif diff < 2592000:  # 30 дней
-        days = int(diff / 86400)
-        return f"{days} дн назад"
-    else:
-        months = int(diff / 2592000)
-        return f"{months} мес назад"
+    return f"{int(diff / divisor)} {unit} назад"
 
 # ---------- Работа с файлами ----------
+# orjson теряет данные там, где json справляется: NaN/Infinity пишет как null и не читает,
+# а целые шире 64 бит не сериализует и при чтении превращает во float.
+# Кроме того, orjson сам сериализует datetime, dataclass, UUID и Enum, которые json
+# не принимает. В таких случаях работаем через json, чтобы результат не зависел от бэкенда.
+# 19 цифр: отрицательные числа ниже минимума int64 тоже уходят в json
+_LONG_NUMBER_RE = re.compile(rb'\d{19,}')
+# Ключи, которые json.dumps приводит к строке сам
+_JSON_KEY_TYPES = (str, int, float, bool, type(None))
+
+def _needs_stdlib_json(data: Any) -> bool:
+    """Проверяет, есть ли в данных то, что orjson запишет иначе, чем json"""
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, float):
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, (uuid.UUID, Enum)):
+            return True
+        elif isinstance(item, dict):
+            if not all(isinstance(key, _JSON_KEY_TYPES) for key in item):
+                return True
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return False
+
+def _dump_json(data: Any, indent: Optional[int]) -> bytes:
+    """Сериализует данные в UTF-8 JSON (orjson, если доступен и поддерживает отступ)"""
+    if ORJSON_AVAILABLE and indent in (None, 2) and not _needs_stdlib_json(data):
+        # datetime и dataclass orjson не сериализует сам, а отдает в json ниже
+        option = (orjson.OPT_NON_STR_KEYS
+                  | orjson.OPT_PASSTHROUGH_DATETIME
+                  | orjson.OPT_PASSTHROUGH_DATACLASS)
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, option=option)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(data, ensure_ascii=False, indent=indent).encode('utf-8')
+
+def _load_json(raw: bytes) -> Any:
+    """Разбирает JSON (orjson, если доступен и не потеряет данные)"""
+    if ORJSON_AVAILABLE and not _LONG_NUMBER_RE.search(raw):
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
 def save_json_file(data: Any, filename: str, indent: int = 2) -> bool:
     """Сохраняет данные в JSON файл"""
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=indent)
+        payload = _dump_json(data, indent)
+        with open(filename, 'wb') as f:
+            f.write(payload)
         return True
     except Exception as e:
         logging.error(f"Error saving JSON file {filename}: {e}")
@@ -153,8 +244,9 @@ def save_json_file(data: Any, filename: str, indent: int = 2) -> bool:
 def load_json_file(filename: str, default: Any = None) -> Any:
     """Загружает данные из JSON файла"""
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(filename, 'rb') as f:
+            raw = f.read()
+        return _load_json(raw)
     except FileNotFoundError:
         logging.warning(f"File {filename} not found, using default value")
         return default
@@ -164,7 +256,6 @@ def load_json_file(filename: str, default: Any = None) -> Any:
 
 def ensure_directory(path: str) -> bool:
     """Создает директорию если она не существует"""
-    import os
     try:
         os.makedirs(path, exist_ok=True)
         return True
@@ -174,12 +265,14 @@ def ensure_directory(path: str) -> bool:
 
 # ---------- Кэширование ----------
 class SimpleCache:
-    """Простой кэш в памяти"""
+    """Простой LRU кэш в памяти"""
     
     def __init__(self, max_size: int = 1000, ttl: int = 300):
         self.max_size = max_size
         self.ttl = ttl
-        self.cache: Dict[str, Tuple[Any, float]] = {}
+        self.ttl_ns = ttl * 1_000_000_000
+        # Порядок ключей — от давно использованных к недавним; метки — time.monotonic_ns()
+        self.cache: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
     
     def get(self, key: str) -> Optional[Any]:
         """Получает значение из кэша"""
@@ -187,20 +280,22 @@ class SimpleCache:
             return None
         
         value, timestamp = self.cache[key]
-        if time.time() - timestamp > self.ttl:
+        if time.monotonic_ns() - timestamp > self.ttl_ns:
             del self.cache[key]
             return None
         
+        self.cache.move_to_end(key)
         return value
     
     def set(self, key: str, value: Any):
         """Устанавливает значение в кэш"""
-        if len(self.cache) >= self.max_size:
-            # Удаляем самый старый элемент
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
-            del self.cache[oldest_key]
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        elif len(self.cache) >= self.max_size:
+            # Удаляем давно не использованный элемент
+            self.cache.popitem(last=False)
         
-        self.cache[key] = (value, time.time())
+        self.cache[key] = (value, time.monotonic_ns())
     
     def delete(self, key: str):
         """Удаляет значение из кэша"""
@@ -217,47 +312,57 @@ class SimpleCache:
 
 # ---------- Рейт лимитинг ----------
 class RateLimiter:
-    """Система ограничения частоты запросов"""
+    """Система ограничения частоты запросов (token bucket)
+    
+    На ключ хранится пара (токены, время последнего пополнения): ведро
+    вмещает max_requests токенов и заполняется полностью за window секунд.
+    Время берется из time.monotonic_ns(), поэтому перевод системных часов
+    не влияет на лимиты.
+    """
     
     def __init__(self, max_requests: int = 10, window: int = 60):
         self.max_requests = max_requests
         self.window = window
-        self.requests: Dict[str, List[float]] = {}
+        self.window_ns = window * 1_000_000_000
+        self._rate_ns = max_requests / self.window_ns
+        self.buckets: Dict[str, Tuple[float, int]] = {}
+    
+    def _refill(self, key: str, now: int) -> float:
+        """Возвращает число токенов у ключа с учетом пополнения"""
+        tokens, last = self.buckets.get(key, (self.max_requests, now))
+        return min(self.max_requests, tokens + (now - last) * self._rate_ns)
     
     def is_allowed(self, key: str) -> bool:
         """Проверяет, разрешен ли запрос"""
-        now = time.time()
+        now = time.monotonic_ns()
+        tokens = self._refill(key, now)
         
-        if key not in self.requests:
-            self.requests[key] = []
+        if tokens >= 1:
+            self.buckets[key] = (tokens - 1, now)
+            return True
         
-        # Удаляем старые запросы
-        self.requests[key] = [
-            req_time for req_time in self.requests[key]
-            if now - req_time < self.window
-        ]
-        
-        if len(self.requests[key]) >= self.max_requests:
-            return False
-        
-        self.requests[key].append(now)
-        return True
+        self.buckets[key] = (tokens, now)
+        return False
     
     def get_wait_time(self, key: str) -> int:
         """Возвращает время ожидания до следующего разрешенного запроса"""
-        if key not in self.requests:
+        if key not in self.buckets:
             return 0
         
-        now = time.time()
-        oldest_request = min(self.requests[key])
-        return max(0, int(self.window - (now - oldest_request)))
+        tokens = self._refill(key, time.monotonic_ns())
+        wait_ns = (1 - tokens) / self._rate_ns
+        return max(0, math.ceil(wait_ns / 1_000_000_000))
     
     def reset(self, key: str):
         """Сбрасывает счетчик для ключа"""
-        if key in self.requests:
-            del self.requests[key]
+        self.buckets.pop(key, None)
 
 # ---------- Утилиты для работы с текстом ----------
+_WORD_RE = re.compile(r'\b\w+\b')
+# Один класс символов без вложенных квантификаторов; завершающая пунктуация в URL не входит
+_URL_RE = re.compile(r'\bhttps?://[^\s<>"\')]*[^\s<>"\'),.!?;:]')
+_EMAIL_EXTRACT_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+
 def truncate_text(text: str, max_length: int, suffix: str = "...") -> str:
     """Обрезает текст до максимальной длины"""
     if len(text) <= max_length:
@@ -265,13 +370,19 @@ def truncate_text(text: str, max_length: int, suffix: str = "...") -> str:
     
     return text[:max_length - len(suffix)] + suffix
 
-def count_words(text: str) -> int:
-    """Подсчитывает количество слов в тексте"""
+def count_words(text: str, unicode: bool = False) -> int:
+    """Подсчитывает количество слов в тексте
+    
+    По умолчанию словом считается все, что разделено пробелами. С unicode=True
+    считаются только последовательности буквенно-цифровых символов, так что
+    отдельно стоящие знаки вроде тире словами не считаются.
+    """
     if not text:
         return 0
     
-    words = re.findall(r'\b\w+\b', text)
-    return len(words)
+    if unicode:
+        return len(_WORD_RE.findall(text))
+    return len(text.split())
 
 def count_characters(text: str, include_spaces: bool = True) -> int:
     """Подсчитывает количество символов в тексте"""
@@ -285,23 +396,20 @@ def count_characters(text: str, include_spaces: bool = True) -> int:
 
 def extract_urls(text: str) -> List[str]:
     """Извлекает URL из текста"""
-    url_pattern = r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?'
-    return re.findall(url_pattern, text)
+    return _URL_RE.findall(text)
 
 def extract_emails(text: str) -> List[str]:
     """Извлекает email адреса из текста"""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    return re.findall(email_pattern, text)
+    return _EMAIL_EXTRACT_RE.findall(text)
 
 def remove_html_tags(text: str) -> str:
     """Удаляет HTML теги из текста"""
-    clean = re.compile('<.*?>')
-    return re.sub(clean, '', text)
+    return _HTML_TAG_RE.sub('', text)
 
 def normalize_whitespace(text: str) -> str:
     """Нормализует пробельные символы в тексте"""
     # Заменяем множественные пробелы на один
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     # Убираем пробелы в начале и конце
     return text.strip()
 
@@ -367,7 +475,6 @@ def format_exception(e: Exception) -> str:
 
 def get_exception_traceback(e: Exception) -> str:
     """Получает traceback исключения"""
-    import traceback
     return ''.join(traceback.format_exception(type(e), e, e.__traceback__))
 
 def safe_execute(func: callable, *args, default_return: Any = None, **kwargs) -> Any:
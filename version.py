@@ -1,8 +1,11 @@
 import os
 import subprocess
 from datetime import datetime
+from functools import lru_cache
 
 
+# Состояние git не меняется за время работы процесса: вызываем его один раз
+@lru_cache(maxsize=None)
 def get_version() -> str:
     """Возвращает строку версии бота.
     Приоритет:
@@ -39,6 +42,7 @@ def get_version() -> str:
     return "dev-" + datetime.utcnow().strftime("%Y%m%d%H%M")
 
 
+@lru_cache(maxsize=None)
 def get_build() -> str:
     """Возвращает строку сборки бота.
     Приоритет:
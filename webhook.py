@@ -9,6 +9,7 @@ import json
 import hashlib
 import hmac
 import logging
+import re
 from datetime import datetime
 from flask import Flask, request, jsonify, Response
 from dotenv import load_dotenv
@@ -29,27 +30,41 @@ YOOMONEY_SHOP_ID = os.getenv("YOOMONEY_SHOP_ID", "")
 YOOMONEY_NOTIFICATION_SECRET = os.getenv("YOOMONEY_NOTIFICATION_SECRET", "")
 YOOMONEY_WEBHOOK_URL = os.getenv("YOOMONEY_WEBHOOK_URL", "")
 
+# Поля уведомления в порядке, в котором они входят в строку подписи до секрета
+_SIGNED_FIELDS = (
+    "notification_type",
+    "operation_id",
+    "amount",
+    "currency",
+    "datetime",
+    "sender",
+    "codepro",
+)
+# Секрет кодируем один раз при загрузке модуля
+_SECRET_BYTES = YOOMONEY_NOTIFICATION_SECRET.encode('utf-8')
+
+# label платежа: ORDER_<user_id>_<timestamp>_<package_key> (см. create_donation_link в bot_vk.py)
+# Сверяется через fullmatch: '$' пропустил бы завершающий перевод строки
+_LABEL_RE = re.compile(r'[^_]+_(?P<user_id>[0-9]+)_(?P<timestamp>[0-9]+)_(?P<package>[A-Za-z0-9]+)')
+
 def verify_yoomoney_signature(data, signature):
     """Проверяет подпись от YooMoney"""
-    if not YOOMONEY_NOTIFICATION_SECRET:
+    # Проверяем то же значение, что пойдет в хеш
+    if not _SECRET_BYTES:
         logger.warning("YOOMONEY_NOTIFICATION_SECRET не настроен")
         return False
     
-    # Формируем строку для проверки подписи
-    check_string = "&".join([
-        data.get("notification_type", ""),
-        data.get("operation_id", ""),
-        data.get("amount", ""),
-        data.get("currency", ""),
-        data.get("datetime", ""),
-        data.get("sender", ""),
-        data.get("codepro", ""),
-        YOOMONEY_NOTIFICATION_SECRET,
-        data.get("label", "")
-    ])
+    # SHA1 в hex — ровно 40 символов; заведомо неверную подпись не считаем
+    if not signature or len(signature) != 40:
+        return False
+    
+    # Формируем байтовую строку для проверки подписи
+    fields = [data.get(key, "").encode('utf-8') for key in _SIGNED_FIELDS]
+    fields.append(_SECRET_BYTES)
+    fields.append(data.get("label", "").encode('utf-8'))
     
     # Вычисляем SHA1 хеш
-    expected_signature = hashlib.sha1(check_string.encode('utf-8')).hexdigest()
+    expected_signature = hashlib.sha1(b"&".join(fields)).hexdigest()
     
     # Не логируем подписи и секреты в продакшене
     
@@ -68,28 +83,27 @@ def process_payment(data):
         logger.info(f"Обработка платежа: {operation_id}, {amount} {currency}, от {sender}")
         
         # Парсим label для получения информации о пользователе и пакете
-        if label and "_" in label:
-            parts = label.split("_")
-            if len(parts) >= 4:
-                user_id = parts[1]
-                timestamp = parts[2]
-                package = parts[3]
-                
-                logger.info(f"Пользователь: {user_id}, Пакет: {package}")
-                
-                # Здесь должна быть логика начисления монет пользователю
-                # Пока что просто логируем
-                logger.info(f"Начисляем монеты пользователю {user_id} за пакет {package}")
-                
-                return {
-                    "success": True,
-                    "user_id": user_id,
-                    "package": package,
-                    "amount": amount,
-                    "operation_id": operation_id
-                }
+        match = _LABEL_RE.fullmatch(label)
+        if not match:
+            return {"success": False, "error": "Неверный формат label"}
+        
+        user_id = match.group("user_id")
+        timestamp = match.group("timestamp")
+        package = match.group("package")
+        
+        logger.info(f"Пользователь: {user_id}, Пакет: {package}")
+        
+        # Здесь должна быть логика начисления монет пользователю
+        # Пока что просто логируем
+        logger.info(f"Начисляем монеты пользователю {user_id} за пакет {package}")
         
-        return {"success": False, "error": "Неверный формат label"}
+        return {
+            "success": True,
+            "user_id": user_id,
+            "package": package,
+            "amount": amount,
+            "operation_id": operation_id
+        }
         
     except Exception as e:
         logger.error(f"Ошибка обработки платежа: {e}")
@@ -104,8 +118,9 @@ def yoomoney_webhook():
         # Подпись приходит как sha1_hash в теле формы (для QuickPay)
         signature = data.get('sha1_hash', '')
         
-        logger.info(f"Получен вебхук от YooMoney: {data}")
-        logger.info(f"Подпись: {signature}")
+        # Тело и подпись пишем только в DEBUG: форматирование ленивое
+        logger.debug("Получен вебхук от YooMoney: %s", data)
+        logger.debug("Подпись: %s", signature)
         
         # Проверяем подпись
         if not verify_yoomoney_signature(data, signature):
@@ -163,6 +178,9 @@ def index():
     <p><a href="/health">Проверка здоровья</a></p>
     """.format(YOOMONEY_MODE, YOOMONEY_WEBHOOK_URL)
 
+# В продакшене приложение запускается через WSGI-сервер (make run-webhook):
+#   gunicorn -w 4 -k gthread --threads 2 -b 0.0.0.0:$PORT webhook:app
+# Встроенный сервер Flask ниже — только для локальной разработки
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     logger.info(f"Запуск вебхука на порту {port}")